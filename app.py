@@ -1,82 +1,70 @@
 # Python libraries
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
 
-# custom module and class
-from vaccine import Vaccine
-
-#import os
-#from dotenv import load_dotenv
-#from utils.b2 import B2
+# custom module and class (server holds the shared Vaccine object, see server.py)
+import server
+from vaccine import Selection, SOC_DEM_OPTIONS, DEFAULT_VACC_INDEX, DEFAULT_GEO_INDEX
+from utils import perf
 
 # set page title to display in browser tab - must be first Streamlit function called in app
 st.set_page_config(page_title = 'Child Vaccinations', page_icon = None)
 
-# ------------------------------------------------------
-#                      APP CONSTANTS
-# ------------------------------------------------------
-#REMOTE_DATA = 'child_vaccination_data_cleaned.csv'
-
-# ------------------------------------------------------
-#                        CONFIG
-# ------------------------------------------------------
-#load_dotenv()
-
-# load Backblaze connection
-#b2 = B2(endpoint=os.environ['B2_ENDPOINT'],
-#        key_id=os.environ['B2_KEYID'],
-#        secret_key=os.environ['B2_APPKEY'])
+# start timing this rerun (only when instrumentation turned on with VACCINE_PERF=1, see utils/perf.py)
+perf.start_rerun()
 
 # ------------------------------------------------------
-#                        CACHING
+#                      APP CONSTANTS
 # ------------------------------------------------------
-@st.cache_data
-def get_data():
-    #b2.set_bucket(os.environ['B2_BUCKETNAME'])
-    #df_data = b2.get_df(REMOTE_DATA)
-    df_data = pd.read_csv('./data/child_vaccination_data_cleaned.csv')
-    return df_data
+# lazy tabs: only the selected tab's content runs (switching tabs reruns app), so a sidebar change builds one chart instead of three
+# set to False to build every tab on each rerun (e.g. for Streamlit versions without on_change for st.tabs)
+LAZY_TABS = True
+TAB_LABELS = [':syringe: Introduction', ':round_pushpin: Compare States', ':chart_with_upwards_trend: Compare Birth Years', ':bar_chart: Compare Sociodemographics', ':mag_right: Learn More']
 
 # ------------------------------------------------------
 #                         APP
 # ------------------------------------------------------
 
-# load data
-df_csv = get_data()
+# get shared object using custom class Vaccine (data loaded on first call, or before server started when run with: python server.py)
+# fetched once per rerun: if background refresh swaps in new data meanwhile, this rerun keeps a consistent snapshot
+with perf.span('get_vaccine'):
+    vax = server.get_vaccine()
 
-# create object using custom class Vaccine
-vax = Vaccine(df_csv)
+# user-selected filter options for this session are stored separately from the shared data
+sel = Selection()
 
 # SIDEBAR WITH FILTERS
-with st.sidebar:
+with st.sidebar, perf.span('sidebar'):
 
     st.write(':red[**Select tab from right to compare data ⮕**]')
     
     st.caption(':green[**⬇ Choose which vaccine data to show**]')
 
-    vax.vacc_option = st.selectbox(':green[Select Vaccine]', vax.vacc_options, index = 1, help = 'Vaccines recommended for children by the time they reach 2 years of age')
+    sel.vacc_option = st.selectbox(':green[Select Vaccine]', vax.vacc_options, index = DEFAULT_VACC_INDEX, help = 'Vaccines recommended for children by the time they reach 2 years of age')
 
-    vax.dose_option = st.selectbox(':green[Select Dose]', vax.get_dose_options(), help = 'Options for dose depend on selected vaccine')
+    sel.dose_option = st.selectbox(':green[Select Dose]', vax.get_dose_options(sel), help = 'Options for dose depend on selected vaccine')
 
-    vax.age_option = st.selectbox(':green[Select Age Checkpoint]', vax.get_age_options(), help = 'Options for age checkpoint depend on selected vaccine and dose')
+    sel.age_option = st.selectbox(':green[Select Age Checkpoint]', vax.get_age_options(sel), help = 'Options for age checkpoint depend on selected vaccine and dose')
 
     st.caption(':blue[**⬇ For line graph and bar chart only**]')
 
-    vax.geo_option = st.selectbox(':blue[Select Geographic Area]', vax.geo_options, index = 1, help = 'Options include: United States, specific State, or certain City/County breakouts')
+    sel.geo_option = st.selectbox(':blue[Select Geographic Area]', vax.geo_options, index = DEFAULT_GEO_INDEX, help = 'Options include: United States, specific State, or certain City/County breakouts')
     
     st.caption(':violet[**⬇ For bar chart only**]')
 
-    vax.soc_dem_option = st.selectbox(':violet[Select Sociodemographic Factor]', ('Race and Ethnicity', 'Poverty Level', 'Health Insurance Coverage', 'Urbanicity'))
+    sel.soc_dem_option = st.selectbox(':violet[Select Sociodemographic Factor]', SOC_DEM_OPTIONS)
 
-    soc_dem_dose_options, dose_index = vax.get_soc_dem_dose_options()
+    soc_dem_dose_options, dose_index = vax.get_soc_dem_dose_options(sel)
 
-    vax.soc_dem_dose = st.selectbox(':violet[Select Dose *(if dose above not available)*]', soc_dem_dose_options, index = dose_index, help = 'Sociodemographic data only available for certain doses of vaccines')
+    sel.soc_dem_dose = st.selectbox(':violet[Select Dose *(if dose above not available)*]', soc_dem_dose_options, index = dose_index, help = 'Sociodemographic data only available for certain doses of vaccines')
 
 # TABS
 st.subheader(':children_crossing: :rainbow[Protecting Children\'s Health]')
-tab1, tab2, tab3, tab4, tab5 = st.tabs([':syringe: Introduction', ':round_pushpin: Compare States', ':chart_with_upwards_trend: Compare Birth Years', ':bar_chart: Compare Sociodemographics', ':mag_right: Learn More'])
+if LAZY_TABS:
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(TAB_LABELS, key = 'tab', on_change = 'rerun')
+else:
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(TAB_LABELS)
+
+# tab.open is True for selected tab, False for hidden tabs, and None when tabs are not lazy (then every tab is built)
 
 # INTRODUCTION
 with tab1:
@@ -101,19 +89,22 @@ with tab1:
 with tab2:
     st.write(':red[⬅ Use filters in sidebar to choose which data are shown]')
     st.write('#### How do child vaccination rates compare across states?')
-    vax.show_choropleth_map()
+    if tab2.open is not False:
+        vax.show_choropleth_map(sel)
 
 # LINE GRAPH
 with tab3:
     st.write(':red[⬅ Use filters in sidebar to choose which data are shown]')
     st.write('#### How do child vaccination rates compare by year of birth?')
-    vax.show_line_graph()
+    if tab3.open is not False:
+        vax.show_line_graph(sel)
 
 # BAR CHART
 with tab4:
     st.write(':red[⬅ Use filters in sidebar to choose which data are shown]')
     st.write('''#### How do child vaccination rates compare by sociodemographics?''')
-    vax.show_bar_chart()
+    if tab4.open is not False:
+        vax.show_bar_chart(sel)
     st.caption('*Sociodemographic data is only available for age 24 months and certain doses of vaccines')
     st.caption('''**FPL** = Federal Poverty Level (lower % FPL = lower family income, higher % FPL = higher family income)  
                **MSA** = Metropolitan Statistical Area (Urban = MSA Principal City, Suburban = MSA Non-Principal City, Rural = Non-MSA)''')
@@ -121,7 +112,8 @@ with tab4:
 # MORE INFO
 with tab5:
     st.write('#### Where can I learn more about vaccinations for children?')
-    st.image('./data/toddler-vaccination.jpg', width = 400)
+    if tab5.open is not False:
+        st.image('./data/toddler-vaccination.jpg', width = 400)
     st.markdown('''The CDC has a [website to help parents learn more about vaccines for their children](https://www.cdc.gov/vaccines-children/), including:  
 - Why vaccines are important for protecting children's health
 - Recommended vaccine schedules by child age
@@ -135,4 +127,15 @@ st.divider()
 st.caption('Original Dataset: [Vaccination Coverage Among Young Children (0-35 Months)](https://data.cdc.gov/Child-Vaccinations/Vaccination-Coverage-among-Young-Children-0-35-Mon/fhky-rtsk/about_data) (data last updated November 3, 2023)')
 st.caption('Copyright © 2024 Michael Frontz')
 st.caption('''This work is licensed under a [Creative Commons Attribution-NonCommercial-ShareAlike 4.0 International License](https://creativecommons.org/licenses/by-nc-sa/4.0/).  
-           You are free to use, share, or adapt this material for non-commercial purposes as long as you provide proper attribution and distribute any copies or adaptations under this same license.''')
\ No newline at end of file
+           You are free to use, share, or adapt this material for non-commercial purposes as long as you provide proper attribution and distribute any copies or adaptations under this same license.''')
+
+# PERFORMANCE DEBUG PANEL (hidden: only shown with instrumentation turned on and ?perf=1 added to app URL)
+if perf.ENABLED and st.query_params.get('perf'):
+    with st.expander('Performance (recent reruns)'):
+        st.dataframe(perf.percentiles(), hide_index = True)
+        st.write('Figure cache:', vax.figure_cache.stats())
+        st.write('Bytes sent (most recent figure per chart):', dict(perf.last_bytes))
+
+# write timings for this rerun as JSON log line
+if perf.ENABLED:
+    perf.end_rerun(tab = st.session_state.get('tab'), figure_cache = vax.figure_cache.stats())
\ No newline at end of file
@@ -0,0 +1,152 @@
+# headless benchmark for the Vaccine class (no browser or Streamlit server needed)
+# usage: python benchmark.py [--data PATH] [--scale 1 10 100] [--limit N] [--cached] [--serialize]
+import argparse
+import random
+import resource
+import sys
+import time
+import tracemalloc
+import types
+import numpy as np
+
+# synthetic data size for each scale: (geographic area copies, birth year range copies) -> rows = scale x original
+SCALES = {1: (1, 1), 10: (5, 2), 100: (20, 5)}
+
+
+def stub_streamlit(serialize):
+    '''
+    Replace streamlit with a stub module before vaccine.py is imported, so Streamlit calls do nothing
+    With serialize=True, plotly_chart still converts the figure to JSON (as st.plotly_chart does before sending it to the browser)
+    '''
+    st = types.ModuleType('streamlit')
+
+    def noop(*args, **kwargs):
+        return None
+
+    def plotly_chart(fig, *args, **kwargs):
+        if serialize:
+            fig.to_json()
+
+    def cache(func = None, **kwargs):
+        return func if func is not None else (lambda f: f)
+
+    st.markdown = st.write = st.caption = noop
+    st.plotly_chart = plotly_chart
+    st.cache_data = st.cache_resource = cache
+    sys.modules['streamlit'] = st
+
+
+def percentiles(times):
+    '''
+    Return count and latency percentiles (ms) for list of timings (seconds)
+    '''
+    ms = np.array(times) * 1000
+    return len(ms), np.percentile(ms, 50), np.percentile(ms, 90), np.percentile(ms, 99), ms.max()
+
+
+def sample(combos, limit, seed = 0):
+    '''
+    Return at most limit combinations (random sample so every vaccine/geography can appear)
+    '''
+    combos = list(combos)
+    if limit and len(combos) > limit:
+        combos = random.Random(seed).sample(combos, limit)
+    return combos
+
+
+def run_benchmark(vax, limit, cached):
+    '''
+    Time option getters and show_* methods over every valid filter combination (or a sample of limit combinations per method)
+    Returns dict of method name -> list of timings (seconds)
+    '''
+    from vaccine import Selection, SOC_DEM_OPTIONS
+    from utils.figure_cache import FigureCache
+
+    if not cached:
+        # cache that never keeps a figure, so every show_* call filters data and builds its figure
+        vax.figure_cache = FigureCache(max_entries = 0)
+
+    # geographic areas come from data (synthetic data has more areas than geo_areas_order.csv)
+    geos = list(vax.data['Geographic Area'].cat.categories)
+
+    # valid filter combinations, following the sidebar dependencies
+    sel = Selection()
+    vacc_doses = []
+    vacc_dose_ages = []
+    vacc_soc_dem_doses = []
+    for vacc in vax.vacc_options:
+        sel.vacc_option = vacc
+        for dose in vax.get_dose_options(sel):
+            vacc_doses.append((vacc, dose))
+            sel.dose_option = dose
+            vacc_dose_ages += [(vacc, dose, age) for age in vax.get_age_options(sel)]
+        vacc_soc_dem_doses += [(vacc, dose) for dose in vax.get_soc_dem_dose_options(sel)[0]]
+
+    calls = {
+        'get_dose_options': [(vacc, None, None, None, None, None) for vacc in vax.vacc_options],
+        'get_age_options': [(vacc, dose, None, None, None, None) for vacc, dose in vacc_doses],
+        'get_soc_dem_dose_options': [(vacc, dose, None, None, None, None) for vacc, dose in vacc_doses],
+        'show_choropleth_map': [(vacc, dose, age, None, None, None) for vacc, dose, age in vacc_dose_ages],
+        'show_line_graph': [(vacc, dose, age, geo, None, None) for vacc, dose, age in vacc_dose_ages for geo in geos],
+        'show_bar_chart': [(vacc, None, None, geo, soc_dem, dose) for vacc, dose in vacc_soc_dem_doses for geo in geos for soc_dem in SOC_DEM_OPTIONS],
+    }
+
+    timings = {}
+    for method, combos in calls.items():
+        func = getattr(vax, method)
+        timings[method] = []
+        for sel.vacc_option, sel.dose_option, sel.age_option, sel.geo_option, sel.soc_dem_option, sel.soc_dem_dose in sample(combos, limit):
+            start = time.perf_counter()
+            func(sel)
+            timings[method].append(time.perf_counter() - start)
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Headless benchmark of Vaccine option getters and charts')
+    parser.add_argument('--data', default = './data/child_vaccination_data_cleaned.csv', help = 'data file (CSV or columnar directory)')
+    parser.add_argument('--scale', type = int, nargs = '+', default = [1], choices = sorted(SCALES), help = 'synthetic data sizes to run')
+    parser.add_argument('--limit', type = int, default = 200, help = 'max combinations timed per method (0 = all)')
+    parser.add_argument('--cached', action = 'store_true', help = 'keep figure cache (default: build every figure)')
+    parser.add_argument('--serialize', action = 'store_true', help = 'include figure JSON serialization in chart timings')
+    args = parser.parse_args()
+
+    stub_streamlit(args.serialize)
+    from vaccine import Vaccine
+    from utils.synthetic import scale_data
+
+    df_data = Vaccine.read_data(args.data)
+
+    for scale in args.scale:
+        geo_copies, year_copies = SCALES[scale]
+        df_scaled = scale_data(df_data, geo_copies, year_copies) if scale > 1 else df_data
+
+        # time and peak Python memory for building Vaccine (data, index, and option tables)
+        tracemalloc.start()
+        start = time.perf_counter()
+        vax = Vaccine(df_scaled)
+        build_time = time.perf_counter() - start
+        _, build_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        timings = run_benchmark(vax, args.limit, args.cached)
+
+        print(f'\nscale {scale}x: {len(df_scaled):,} rows, {df_scaled["Geographic Area"].nunique()} geographic areas, '
+              f'{df_scaled["Birth Year"].nunique()} birth years')
+        print(f'Vaccine() build: {build_time * 1000:.0f} ms, peak {build_peak / 1e6:.1f} MB; '
+              f'data {vax.data.memory_usage(deep = True).sum() / 1e6:.1f} MB')
+        print(f'{"method":<26}{"calls":>7}{"p50 ms":>10}{"p90 ms":>10}{"p99 ms":>10}{"max ms":>10}')
+        for method, times in timings.items():
+            if times:
+                count, p50, p90, p99, max_ms = percentiles(times)
+                print(f'{method:<26}{count:>7}{p50:>10.2f}{p90:>10.2f}{p99:>10.2f}{max_ms:>10.2f}')
+        if args.cached:
+            print('figure cache:', vax.figure_cache.stats())
+
+    # ru_maxrss is in KB on Linux (bytes on macOS)
+    print(f'\nprocess peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB')
+
+
+if __name__ == '__main__':
+    main()
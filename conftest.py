@@ -0,0 +1 @@
+# makes the repository root importable in tests (e.g. "from utils.b2 import B2") when running plain "pytest"
@@ -0,0 +1,226 @@
+# process-wide shared data for vaccine app, and server entry point that warms caches before serving
+# usage: python server.py [streamlit options]   (instead of: streamlit run app.py [streamlit options])
+import logging
+import os
+import sys
+import threading
+import time
+
+# custom module and class
+from vaccine import Vaccine
+from utils import perf
+from utils.columnar import SCHEMA_FILE
+
+from vaccine import DATA_DTYPES
+
+#from dotenv import load_dotenv
+
+# ------------------------------------------------------
+#                      CONSTANTS
+# ------------------------------------------------------
+# data file in Backblaze bucket (used instead of local data when B2_BUCKETNAME is set, see CONFIG below)
+REMOTE_DATA = 'child_vaccination_data_cleaned.csv'
+B2_CACHE = './data/b2_cache'
+
+# columnar copy of data (created with: python -m utils.columnar) is memory-mapped when available, otherwise CSV is parsed
+COLUMNAR_DATA = './data/child_vaccination_data_cleaned'
+CSV_DATA = './data/child_vaccination_data_cleaned.csv'
+
+# seconds between background checks for new data (0 turns off refresh), e.g. VACCINE_REFRESH_SECONDS=60 python server.py
+REFRESH_INTERVAL = int(os.environ.get('VACCINE_REFRESH_SECONDS', 600))
+
+# changed data source is only read once its version stays the same this long (e.g. not while a file is still being copied)
+SETTLE_SECONDS = 5
+
+# refresh results are written to stderr (one line each)
+logger = logging.getLogger('vaccine.refresh')
+if not logger.handlers:
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter('%(asctime)s %(name)s %(levelname)s: %(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# ------------------------------------------------------
+#                        CONFIG
+# ------------------------------------------------------
+#load_dotenv()
+
+# load Backblaze connection when bucket is configured (environment variables B2_ENDPOINT, B2_KEYID, B2_APPKEY, B2_BUCKETNAME)
+# otherwise data is read from local files; B2 (and boto3) only imported when used
+b2 = None
+if os.environ.get('B2_BUCKETNAME'):
+    from utils.b2 import B2
+    b2 = B2(endpoint=os.environ['B2_ENDPOINT'],
+            key_id=os.environ['B2_KEYID'],
+            secret_key=os.environ['B2_APPKEY'],
+            cache_dir=B2_CACHE)
+    b2.set_bucket(os.environ['B2_BUCKETNAME'])
+
+# ------------------------------------------------------
+#                     SHARED DATA
+# ------------------------------------------------------
+# one shared Vaccine object per process (reused by every session and rerun, so data is not copied or re-hashed per rerun)
+# kept in this module (not st.cache_resource in app.py) so it can be created and warmed up before the Streamlit server starts
+# when data source changes, a background thread builds a new Vaccine object and replaces this reference in one assignment
+# (never modified in place), so each rerun keeps using the object it got from get_vaccine() and no rerun waits for a reload
+vaccine = None
+vaccine_version = None
+vaccine_lock = threading.Lock()
+
+refresher = None
+refresh_lock = threading.Lock()
+
+# version of data source that could not be processed (not retried until data source changes again)
+rejected_version = None
+
+def data_path():
+    '''
+    Return data set path (memory-mapped columnar copy if available, otherwise CSV)
+    '''
+    return COLUMNAR_DATA if os.path.isdir(COLUMNAR_DATA) else CSV_DATA
+
+def data_version():
+    '''
+    Return version of data source without loading it (changes whenever data is replaced)
+    Backblaze data = file name and ETag (one HEAD request)
+    Local data = path, modification time, and size (schema file for columnar copy, which is written last)
+    '''
+    if b2 is not None:
+        head = b2.head(REMOTE_DATA)
+        if head is None:
+            raise FileNotFoundError(f'{REMOTE_DATA} not found in Backblaze bucket')
+        return (REMOTE_DATA, head['ETag'])
+
+    path = data_path()
+    stat = os.stat(os.path.join(path, SCHEMA_FILE) if os.path.isdir(path) else path)
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+def get_data():
+    '''
+    Load data set (from Backblaze if configured, otherwise memory-mapped columnar copy if available, otherwise CSV)
+    '''
+    with perf.span('get_data'):
+        if b2 is not None:
+            df_data = b2.get_df(REMOTE_DATA, usecols=lambda col: col in DATA_DTYPES, dtype=DATA_DTYPES)
+        else:
+            df_data = Vaccine.read_data(data_path())
+    return df_data
+
+def get_vaccine():
+    '''
+    Get shared Vaccine object (data loaded on first call, which also starts background refresh)
+    Callers should get it once per rerun, so every chart in a rerun uses the same data
+    '''
+    global vaccine, vaccine_version
+    if vaccine is None:
+        with vaccine_lock:
+            if vaccine is None:
+                version = data_version()
+                vaccine = Vaccine(get_data())
+                vaccine_version = version
+        start_refresher()
+    return vaccine
+
+def check_data(new_vaccine):
+    '''
+    Return reason new Vaccine object must not replace current one (None if it can)
+    New data must be complete (data, index, and filter options built) and not empty
+    Options may change between data versions (e.g. CDC drops a breakout), sessions then fall back to default option
+    '''
+    # Vaccine methods return None when data cannot be processed
+    if new_vaccine.data is None or new_vaccine.index is None or new_vaccine.filter_options is None:
+        return 'new data could not be processed'
+
+    if len(new_vaccine.data) == 0:
+        return 'new data has no rows'
+
+    return None
+
+def refresh():
+    '''
+    Check data source and, if it changed, build new Vaccine object (data, index, filter options, and warmed-up figures) and swap it in
+    Sessions keep using current object while new one is built; returns True if data was replaced
+    '''
+    global vaccine, vaccine_version, rejected_version
+
+    # only one refresh at a time
+    if not refresh_lock.acquire(blocking = False):
+        return False
+
+    try:
+        version = data_version()
+        if version in (vaccine_version, rejected_version):
+            return False
+
+        # data source still changing: read it on a later check instead
+        time.sleep(SETTLE_SECONDS)
+        if data_version() != version:
+            return False
+
+        with perf.span('refresh'):
+            new_vaccine = Vaccine(get_data())
+
+            # keep current data if new data is incomplete or empty
+            reason = check_data(new_vaccine)
+            if reason is not None:
+                logger.warning('Data refresh skipped: %s', reason)
+                rejected_version = version
+                return False
+
+            new_vaccine.warm_up()
+
+        with vaccine_lock:
+            vaccine = new_vaccine
+            vaccine_version = version
+
+        logger.info('Data refreshed from %s', version[0])
+        return True
+
+    finally:
+        refresh_lock.release()
+
+def refresh_loop():
+    '''
+    Check for new data every REFRESH_INTERVAL seconds (runs in background thread)
+    '''
+    while True:
+        time.sleep(REFRESH_INTERVAL)
+        try:
+            refresh()
+        except Exception:
+            logger.exception('Data refresh failed (keeping current data)')
+
+def start_refresher():
+    '''
+    Start background refresh thread (once per process)
+    '''
+    global refresher
+    if REFRESH_INTERVAL <= 0:
+        return
+
+    with vaccine_lock:
+        if refresher is None:
+            refresher = threading.Thread(target = refresh_loop, name = 'vaccine-refresh', daemon = True)
+            refresher.start()
+
+def warm_up():
+    '''
+    Load data and pre-build figures for default sidebar selections, so first visitor does not wait for them
+    '''
+    vax = get_vaccine()
+    vax.warm_up()
+    return vax
+
+# ------------------------------------------------------
+#                    SERVER ENTRY POINT
+# ------------------------------------------------------
+if __name__ == '__main__':
+    # import this file as module "server" (the name app.py imports) so the warmed-up object is the one sessions use
+    import server
+    server.warm_up()
+
+    # start Streamlit server in this process (server only reports healthy once warm-up above is done)
+    from streamlit.web import cli
+    sys.argv = ['streamlit', 'run', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py'), *sys.argv[1:]]
+    sys.exit(cli.main())
@@ -0,0 +1,97 @@
+import os
+import pandas as pd
+import pytest
+
+moto = pytest.importorskip('moto')
+
+from utils.b2 import B2
+
+BUCKET = 'vaccine-test-bucket'
+
+
+@pytest.fixture
+def b2(tmp_path, monkeypatch):
+    """
+    B2 connection to an in-memory S3 bucket (moto), with a local file cache.
+    """
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    with moto.mock_aws():
+        b2 = B2(endpoint='https://s3.amazonaws.com', key_id='test', secret_key='test',
+                cache_dir=str(tmp_path / 'cache'))
+        b2.b2.create_bucket(Bucket=BUCKET)
+        b2.set_bucket(BUCKET)
+        yield b2
+
+
+def get_object_statuses(b2):
+    """
+    Record the HTTP status of every GetObject response sent to `b2`.
+    """
+    statuses = []
+    b2.b2.meta.client.meta.events.register(
+        'after-call.s3.GetObject', lambda http_response, **kwargs: statuses.append(http_response.status_code))
+    return statuses
+
+
+def test_cached_file_revalidated_with_etag(b2):
+    b2.bucket.put_object(Key='data.csv', Body=b'a,b\n1,2\n')
+    statuses = get_object_statuses(b2)
+
+    path = b2.get_cached_file('data.csv')
+    assert b2.get_cached_file('data.csv') == path
+    assert statuses == [200, 304]
+
+    with open(path, 'rb') as f:
+        assert f.read() == b'a,b\n1,2\n'
+
+    # temporary download files are swapped in, not left next to the cached copy
+    assert sorted(os.listdir(os.path.dirname(path))) == ['data.csv', 'data.csv.etag']
+
+
+def test_cached_file_downloaded_again_when_changed(b2):
+    b2.bucket.put_object(Key='data.csv', Body=b'a,b\n1,2\n')
+    statuses = get_object_statuses(b2)
+    path = b2.get_cached_file('data.csv')
+
+    b2.bucket.put_object(Key='data.csv', Body=b'a,b\n3,4\n')
+    assert b2.get_cached_file('data.csv') == path
+    assert statuses == [200, 200]
+
+    with open(path, 'rb') as f:
+        assert f.read() == b'a,b\n3,4\n'
+
+
+def test_get_df_reads_cached_file_in_chunks(b2):
+    b2.bucket.put_object(Key='data.csv', Body=b'Vaccine,Estimate (%)\nMMR,90.1\nDTaP,80.5\nMMR,70.2\n')
+
+    df = b2.get_df('data.csv', chunksize=1, dtype={'Vaccine': 'category'})
+    assert df['Vaccine'].tolist() == ['MMR', 'DTaP', 'MMR']
+    assert isinstance(df['Vaccine'].dtype, pd.CategoricalDtype)
+    assert b2.get_df('data.csv').equals(pd.read_csv(b2.get_cached_file('data.csv')))
+
+
+def test_sync_dir_skips_unchanged_files(b2, tmp_path):
+    local_dir = tmp_path / 'columnar'
+    local_dir.mkdir()
+    (local_dir / 'schema.json').write_text('{"rows": 2}')
+    (local_dir / '000.npy').write_bytes(b'\x00\x01')
+
+    result = b2.sync_dir(str(local_dir), 'data/')
+    assert sorted(result['uploaded']) == ['data/000.npy', 'data/schema.json']
+    assert result['skipped'] == []
+
+    result = b2.sync_dir(str(local_dir), 'data/')
+    assert result['uploaded'] == []
+    assert sorted(result['skipped']) == ['data/000.npy', 'data/schema.json']
+
+    # same size but different content is uploaded again (only that file)
+    (local_dir / '000.npy').write_bytes(b'\x01\x00')
+    result = b2.sync_dir(str(local_dir), 'data/')
+    assert result == {'uploaded': ['data/000.npy'], 'skipped': ['data/schema.json']}
+    assert b2.get_object('data/000.npy').read() == b'\x01\x00'
+
+
+def test_head_returns_none_for_missing_key(b2):
+    assert b2.head('missing.csv') is None
+    b2.bucket.put_object(Key='present.csv', Body=b'a\n')
+    assert b2.head('present.csv')['ContentLength'] == 2
@@ -0,0 +1,65 @@
+import os
+import numpy as np
+import pandas as pd
+
+from utils.columnar import read_columnar, write_columnar
+
+
+def sample_frame(estimate):
+    return pd.DataFrame({'Vaccine': pd.Categorical(['MMR', 'DTaP', 'MMR']),
+                         'Birth Year': pd.array([2019, None, 2020], dtype='Int16'),
+                         'Estimate (%)': np.array([90.1, 80.5, estimate], dtype='float32')})
+
+
+def assert_same(df, expected):
+    # compared column by column (assert_frame_equal also compares array classes, and memory-mapped arrays are np.memmap)
+    assert list(df.columns) == list(expected.columns)
+    assert df.dtypes.tolist() == expected.dtypes.tolist()
+    for col in expected.columns:
+        assert df[col].tolist() == expected[col].tolist()
+
+
+def versioned_dirs(tmp_path):
+    return sorted(name for name in os.listdir(tmp_path) if name.startswith('data.'))
+
+
+def test_round_trip_and_replace(tmp_path):
+    path = str(tmp_path / 'data')
+
+    first = sample_frame(70.2)
+    write_columnar(first, path)
+    assert_same(read_columnar(path), first)
+
+    # second write switches the symlink to a new copy and removes the old one
+    old_target = os.readlink(path)
+    second = sample_frame(60.3)
+    write_columnar(second, path)
+
+    df = read_columnar(path)
+    assert_same(df, second)
+    assert os.path.islink(path) and os.readlink(path) != old_target
+    assert versioned_dirs(tmp_path) == [os.readlink(path)]
+
+
+def test_replaces_plain_directory(tmp_path):
+    # directory written by the earlier layout (not a symlink)
+    path = str(tmp_path / 'data')
+    os.makedirs(path)
+    with open(os.path.join(path, 'old.npy'), 'w') as f:
+        f.write('old')
+
+    write_columnar(sample_frame(70.2), path)
+
+    assert os.path.islink(path)
+    assert_same(read_columnar(path), sample_frame(70.2))
+    assert versioned_dirs(tmp_path) == [os.readlink(path)]
+    assert not os.path.exists(path + '.old')
+
+
+def test_columns_are_memory_mapped(tmp_path):
+    path = str(tmp_path / 'data')
+    write_columnar(sample_frame(70.2), path)
+
+    df = read_columnar(path, columns=['Estimate (%)'])
+    assert list(df.columns) == ['Estimate (%)']
+    assert isinstance(np.asarray(df['Estimate (%)'].array).base, np.memmap)
@@ -0,0 +1,102 @@
+import pandas as pd
+import pytest
+
+from utils.ingest import CLEAN_COLUMNS, RAW_COLUMNS, ingest
+
+
+def raw_row(vaccine, dose, birth, estimate, geography='Texas', dimension_type='Age', dimension='24 Months'):
+    return {'Vaccine': vaccine, 'Dose': dose, 'Geography Type': 'States/Local Areas', 'Geography': geography,
+            'Birth Year/Birth Cohort': birth, 'Dimension Type': dimension_type, 'Dimension': dimension,
+            'Estimate (%)': estimate, '95% CI (%)': '1.0 to 2.0', 'Sample Size': '100'}
+
+
+def raw_rows():
+    return [raw_row('MMR', '≥1 Dose', '2019', '90.1'),
+            raw_row('MMR', '≥1 Dose', '2020', '91.2'),
+            raw_row('MMR', '≥1 Dose', '2020', 'NR', geography='Ohio'),
+            raw_row('Combined 7 Series', None, '2020', '70.5'),
+            raw_row('DTaP', '≥4 Doses', '2016-2019', '80.3', dimension_type='Poverty', dimension='Below Poverty'),
+            raw_row('DTaP', '≥4 Doses', None, '75.0')]
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return {'raw_path': str(tmp_path / 'raw.csv'), 'out_path': str(tmp_path / 'clean.csv'),
+            'state_dir': str(tmp_path / 'state')}
+
+
+def write_raw(paths, rows):
+    pd.DataFrame(rows, columns=RAW_COLUMNS).to_csv(paths['raw_path'], index=False)
+
+
+def read_out(paths):
+    return pd.read_csv(paths['out_path'], dtype=str)
+
+
+def test_first_run_cleans_every_partition(paths):
+    write_raw(paths, raw_rows())
+
+    result = ingest(**paths, chunksize=2)
+    assert sorted(result['processed']) == ['', '2016-2019', '2019', '2020']
+    assert result['unchanged'] == [] and result['removed'] == []
+
+    out = read_out(paths)
+    assert list(out.columns) == CLEAN_COLUMNS
+    # every row with an estimate is kept (including the one with blank birth year/cohort)
+    assert len(out) == 5
+    assert out.loc[out['Vaccine'] == 'Combined 7 Series', 'Dose'].tolist() == ['Full Series']
+    assert out.loc[out['Poverty Level'].notna(), 'Birth Cohort'].tolist() == ['2016-2019']
+    assert out['State'].unique().tolist() == ['TX']
+
+
+def test_blank_partition_kept(paths):
+    write_raw(paths, raw_rows())
+    ingest(**paths)
+
+    blank = read_out(paths).query('Vaccine == "DTaP" and `Poverty Level`.isna()')
+    assert len(blank) == 1
+    assert blank['Birth Year'].isna().all() and blank['Birth Cohort'].isna().all()
+
+
+def test_rerun_without_changes_does_nothing(paths):
+    write_raw(paths, raw_rows())
+    ingest(**paths)
+    before = read_out(paths)
+
+    result = ingest(**paths)
+    assert result['processed'] == [] and result['removed'] == []
+    assert sorted(result['unchanged']) == ['', '2016-2019', '2019', '2020']
+    pd.testing.assert_frame_equal(read_out(paths), before)
+
+
+def test_changed_row_reprocesses_only_its_partition(paths):
+    write_raw(paths, raw_rows())
+    ingest(**paths)
+
+    rows = raw_rows()
+    rows[0]['Estimate (%)'] = '95.5'
+    write_raw(paths, rows)
+
+    result = ingest(**paths)
+    assert result['processed'] == ['2019']
+    assert sorted(result['unchanged']) == ['', '2016-2019', '2020']
+    assert read_out(paths).query('`Birth Year` == "2019"')['Estimate (%)'].tolist() == ['95.5']
+
+
+def test_removed_partition(paths):
+    write_raw(paths, raw_rows())
+    ingest(**paths)
+
+    write_raw(paths, [row for row in raw_rows() if row['Birth Year/Birth Cohort'] != '2016-2019'])
+
+    result = ingest(**paths)
+    assert result['processed'] == [] and result['removed'] == ['2016-2019']
+    out = read_out(paths)
+    assert len(out) == 4 and out['Birth Cohort'].isna().all()
+
+
+def test_blank_dose_without_fill_raises(paths):
+    write_raw(paths, raw_rows() + [raw_row('Hep B', None, '2020', '60.0')])
+
+    with pytest.raises(ValueError, match='Hep B'):
+        ingest(**paths)
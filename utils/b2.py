@@ -1,12 +1,23 @@
+import hashlib
 import mimetypes
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import pandas as pd
+from pandas.api.types import union_categoricals
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
 from botocore.config import Config
 
+# files larger than this are uploaded in parts (several parts sent at once)
+MULTIPART_THRESHOLD = 64 * 1024 * 1024
+MULTIPART_CHUNKSIZE = 16 * 1024 * 1024
+
 
 class B2(object):
-    def __init__(self, endpoint, key_id, secret_key):
+    def __init__(self, endpoint, key_id, secret_key, cache_dir=None):
         """
         Set up a connection between the current instance and Backblaze.
 
@@ -18,6 +29,10 @@ class B2(object):
             The "Key ID" for the application key from Backblaze.
         secret_key : str
             The Key secret, or "Key" for the Backblaze app key itself.
+        cache_dir : str, optional
+            Local directory where downloaded files are cached (validated by
+            ETag, so unchanged files are not downloaded again after restart).
+            Files are not cached when not set.
         """
         # Return a boto3 resource object for B2 service
         self.b2 = boto3.resource(service_name='s3',
@@ -25,7 +40,8 @@ class B2(object):
                                 aws_access_key_id=key_id,
                                 aws_secret_access_key=secret_key,
                                 config=Config(signature_version='s3v4'))
-        
+        self.cache_dir = cache_dir
+
     def set_bucket(self, bucket_name):
         """
         Select a bucket accessible by the chosen app key.
@@ -37,25 +53,119 @@ class B2(object):
         """
         self.bucket = self.b2.Bucket(bucket_name)
 
-    def list_files(self, verbose=False):
-        if verbose:
-            return [f.get() for f in self.bucket.objects.all()]
+    def list_files(self, verbose=False, prefix='', page_size=1000):
+        """
+        Yield the files in the bucket, one listing page at a time.
+
+        Parameters
+        ----------
+        verbose : bool
+            Yield the full object (`get()` response) instead of just the key.
+        prefix : str
+            Only list keys starting with `prefix`.
+        page_size : int
+            Number of keys requested per listing call.
+        """
+        for f in self.bucket.objects.filter(Prefix=prefix).page_size(page_size):
+            if verbose:
+                yield f.get()
+            else:
+                yield f.key
+
+    def head(self, remote_path):
+        """
+        Return the metadata (`head_object` response) of `remote_path`, or
+        None if it does not exist. Costs one request regardless of bucket size.
+        """
+        try:
+            return self.b2.meta.client.head_object(Bucket=self.bucket.name, Key=remote_path)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    def get_df(self, remote_path, chunksize=100_000, **read_csv_args):
+        """
+        Read a CSV file from the bucket into a DataFrame.
+
+        The file is streamed and parsed in chunks, so the whole body is never
+        held in memory. When `cache_dir` is set, the file is read from the
+        local cache (see `get_cached_file`).
+
+        Parameters
+        ----------
+        remote_path : str
+            Key of the CSV file in the bucket.
+        chunksize : int
+            Number of rows parsed at a time.
+        **read_csv_args
+            Extra arguments for `pandas.read_csv` (e.g. `usecols`, `dtype`).
+        """
+        if self.cache_dir is None:
+            source = self.bucket.Object(remote_path).get()['Body']
         else:
-            return [f.key for f in self.bucket.objects.all()]
+            source = self.get_cached_file(remote_path)
+
+        chunks = pd.read_csv(source, chunksize=chunksize, **read_csv_args)
+        return concat_chunks(list(chunks))
+
+    def get_cached_file(self, remote_path, chunk_size=1024 * 1024):
+        """
+        Return the local path of a cached copy of `remote_path`.
+
+        Cached files are stored under `cache_dir/<bucket>/<remote_path>` with
+        the object's ETag next to them. A conditional request (If-None-Match)
+        skips the transfer when the object has not changed; otherwise the
+        object is streamed to disk in chunks and replaces the cached copy.
+
+        Parameters
+        ----------
+        remote_path : str
+            Key of the file in the bucket.
+        chunk_size : int
+            Number of bytes downloaded at a time.
+        """
+        local_path = os.path.join(self.cache_dir, self.bucket.name, remote_path)
+        etag_path = local_path + '.etag'
+
+        etag = None
+        if os.path.exists(local_path) and os.path.exists(etag_path):
+            with open(etag_path) as f:
+                etag = f.read().strip()
 
-    def get_df(self, remote_path):
-        # Get file
         obj = self.bucket.Object(remote_path)
-        df = pd.read_csv(obj.get()['Body'])
-        return df
+        try:
+            if etag is None:
+                response = obj.get()
+            else:
+                response = obj.get(IfNoneMatch=etag)
+        except ClientError as e:
+            # 304 Not Modified: cached copy is current
+            if etag is not None and e.response['Error']['Code'] in ('304', 'NotModified'):
+                return local_path
+            raise
+
+        # stream body to temporary file, then swap it in so an interrupted download never leaves a partial cached file
+        # temporary file name is unique, so processes filling the same cache at once never write into each other's file
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        with write_replace(local_path, 'wb') as f:
+            for chunk in response['Body'].iter_chunks(chunk_size):
+                f.write(chunk)
+
+        with write_replace(etag_path, 'w') as f:
+            f.write(response['ETag'])
+
+        return local_path
     
     def get_object(self, remote_path):
         obj = self.bucket.Object(remote_path)
         return obj.get()['Body']
 
-    def file_to_b2(self, local_path, remote_path):
+    def file_to_b2(self, local_path, remote_path, md5=None):
         '''
         Send `local_path` file to `remote_path`.
+        Large files are sent as a multipart upload. The file's MD5 is stored
+        in the object metadata so `sync_dir` can detect unchanged files.
         '''
         # Guess the type of a file based on its URL
         mimetype, _ = mimetypes.guess_type(local_path)
@@ -63,16 +173,125 @@ class B2(object):
         if mimetype is None:
             raise Exception("Failed to guess mimetype")
         
-        if remote_path in [f.key for f in self.bucket.objects.all()]:
+        self.upload(local_path, remote_path, mimetype, self.head(remote_path) is not None, md5)
+
+    def upload(self, local_path, remote_path, mimetype, exists, md5=None):
+        '''
+        Upload `local_path` to `remote_path` (`exists` = whether this overwrites an existing file).
+        '''
+        if exists:
             print(f'Overwriting {remote_path} ...')
         else:
             print(f'Uploading {remote_path} ...')
-        
-        self.bucket.upload_file(
+
+        # client (not bucket resource) is used because it is safe to share between threads
+        self.b2.meta.client.upload_file(
             Filename=local_path,
+            Bucket=self.bucket.name,
             Key=remote_path,
             ExtraArgs={
-                "ContentType": mimetype
-            }
+                "ContentType": mimetype,
+                "Metadata": {"md5": md5 or file_md5(local_path)}
+            },
+            Config=TransferConfig(multipart_threshold=MULTIPART_THRESHOLD,
+                                  multipart_chunksize=MULTIPART_CHUNKSIZE)
         )
-    
\ No newline at end of file
+
+    def sync_dir(self, local_dir, remote_prefix='', max_workers=4):
+        """
+        Publish every file under `local_dir` to `remote_prefix` in the bucket.
+
+        Each file is checked individually by key: it is skipped when the
+        remote object has the same size and MD5 (from the metadata written by
+        `file_to_b2`, or the ETag of a single-part upload). Changed files are
+        uploaded concurrently.
+
+        Parameters
+        ----------
+        local_dir : str
+            Directory to publish (e.g. the columnar data directory).
+        remote_prefix : str
+            Prefix added to each file's path relative to `local_dir`.
+        max_workers : int
+            Number of files uploaded at the same time.
+
+        Returns
+        -------
+        dict
+            Lists of remote keys that were 'uploaded' and 'skipped'.
+        """
+        files = []
+        for root, _, names in os.walk(local_dir):
+            for name in sorted(names):
+                local_path = os.path.join(root, name)
+                rel_path = os.path.relpath(local_path, local_dir).replace(os.sep, '/')
+                files.append((local_path, remote_prefix + rel_path))
+
+        def sync_file(local_path, remote_path):
+            remote = self.head(remote_path)
+            md5 = None
+            if remote is not None and remote['ContentLength'] == os.path.getsize(local_path):
+                md5 = file_md5(local_path)
+                remote_md5 = remote.get('Metadata', {}).get('md5') or remote['ETag'].strip('"')
+                if remote_md5 == md5:
+                    return 'skipped'
+
+            mimetype, _ = mimetypes.guess_type(local_path)
+            self.upload(local_path, remote_path, mimetype or 'application/octet-stream', remote is not None, md5)
+            return 'uploaded'
+
+        result = {'uploaded': [], 'skipped': []}
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            statuses = pool.map(lambda file: sync_file(*file), files)
+            for (_, remote_path), status in zip(files, statuses):
+                result[status].append(remote_path)
+
+        return result
+
+def concat_chunks(chunks):
+    """
+    Concatenate DataFrame chunks parsed from the same file.
+
+    Categorical columns are combined with `union_categoricals` because chunks
+    can see different categories (a plain concat would turn them into object
+    columns).
+    """
+    if not chunks:
+        return pd.DataFrame()
+
+    data = {}
+    for col, dtype in chunks[0].dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            data[col] = union_categoricals([chunk[col] for chunk in chunks])
+        else:
+            data[col] = pd.concat([chunk[col] for chunk in chunks], ignore_index=True)
+    return pd.DataFrame(data)
+
+
+@contextmanager
+def write_replace(path, mode):
+    """
+    Open a new uniquely named temporary file next to `path` for writing,
+    and replace `path` with it once the `with` block completes (the
+    temporary file is removed instead if the block fails).
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.', suffix='.part')
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def file_md5(local_path, chunk_size=1024 * 1024):
+    """
+    Return the hex MD5 digest of a local file, read in chunks.
+    """
+    md5 = hashlib.md5()
+    with open(local_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
@@ -0,0 +1,120 @@
+import json
+import os
+import shutil
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# name of file describing columns stored in a columnar data directory
+SCHEMA_FILE = 'schema.json'
+
+
+def write_columnar(df, path):
+    """
+    Write a DataFrame to a typed columnar directory (one .npy file per column
+    plus a JSON schema) that can be memory-mapped by `read_columnar`.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Data to write. Text columns are stored as categoricals (integer codes
+        plus category labels), nullable integer columns as values plus a mask.
+    path : str
+        Directory to create. `path` is a symlink to a versioned directory
+        next to it, so an existing copy is replaced in one atomic step (the
+        symlink is switched) once the new copy has been completely written.
+    """
+    tmp_path = f'{path}.{time.time_ns()}'
+    os.makedirs(tmp_path)
+
+    columns = []
+    for i, (name, col) in enumerate(df.items()):
+        file = f'{i:03d}'
+        if isinstance(col.dtype, pd.CategoricalDtype) or not pd.api.types.is_numeric_dtype(col.dtype):
+            col = col.astype('category')
+            np.save(os.path.join(tmp_path, file + '.npy'), col.cat.codes.to_numpy())
+            columns.append({'name': name, 'kind': 'category', 'file': file,
+                            'categories': [str(c) for c in col.cat.categories]})
+        elif isinstance(col.dtype, pd.api.extensions.ExtensionDtype):
+            # nullable integer / float columns (e.g. Int16)
+            np.save(os.path.join(tmp_path, file + '.npy'), col.to_numpy(dtype=col.dtype.numpy_dtype, na_value=0))
+            np.save(os.path.join(tmp_path, file + '.mask.npy'), col.isna().to_numpy())
+            columns.append({'name': name, 'kind': 'masked', 'file': file, 'dtype': str(col.dtype)})
+        else:
+            np.save(os.path.join(tmp_path, file + '.npy'), col.to_numpy())
+            columns.append({'name': name, 'kind': 'numpy', 'file': file})
+
+    with open(os.path.join(tmp_path, SCHEMA_FILE), 'w') as f:
+        json.dump({'rows': len(df), 'columns': columns}, f, indent=1)
+
+    # switch symlink to new copy (os.replace is atomic, so readers always find a complete copy at `path`)
+    link_path = path + '.link'
+    if os.path.lexists(link_path):
+        os.remove(link_path)
+    os.symlink(os.path.basename(tmp_path), link_path)
+
+    if os.path.islink(path):
+        old_path = os.path.join(os.path.dirname(path), os.readlink(path))
+    elif os.path.isdir(path):
+        # plain directory written by an earlier version: moved aside first (only time there is no copy at `path`)
+        old_path = path + '.old'
+        shutil.rmtree(old_path, ignore_errors=True)
+        os.rename(path, old_path)
+    else:
+        old_path = None
+    os.replace(link_path, path)
+
+    # old copy removed (processes that memory-mapped it keep their mapped files until they reload)
+    if old_path is not None and os.path.abspath(old_path) != os.path.abspath(tmp_path):
+        shutil.rmtree(old_path, ignore_errors=True)
+
+
+def read_columnar(path, columns=None):
+    """
+    Load a columnar directory written by `write_columnar`.
+
+    Column files are memory-mapped read-only, so the data is paged in only
+    when used and processes on the same host share the same physical pages.
+
+    Parameters
+    ----------
+    path : str
+        Columnar data directory.
+    columns : list of str, optional
+        Columns to load (columns not in the data are skipped). Columns keep
+        the order they were written in. All columns are loaded by default.
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    with open(os.path.join(path, SCHEMA_FILE)) as f:
+        schema = json.load(f)
+
+    data = {}
+    for col in schema['columns']:
+        if columns is not None and col['name'] not in columns:
+            continue
+        values = np.load(os.path.join(path, col['file'] + '.npy'), mmap_mode='r')
+        if col['kind'] == 'category':
+            data[col['name']] = pd.Categorical.from_codes(values, categories=col['categories'], validate=False)
+        elif col['kind'] == 'masked':
+            mask = np.load(os.path.join(path, col['file'] + '.mask.npy'), mmap_mode='r')
+            data[col['name']] = pd.api.types.pandas_dtype(col['dtype']).construct_array_type()(values, mask)
+        else:
+            data[col['name']] = values
+
+    return pd.DataFrame(data, copy=False)
+
+
+if __name__ == '__main__':
+    # convert cleaned CSV data file into columnar directory used by the app
+    # usage: python -m utils.columnar [csv_path] [columnar_path]
+    from vaccine import Vaccine
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else './data/child_vaccination_data_cleaned.csv'
+    columnar_path = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(csv_path)[0]
+
+    write_columnar(Vaccine.read_data(csv_path), columnar_path)
+    print(f'Wrote {columnar_path}')
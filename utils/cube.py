@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+# cube axes: query argument name -> data column
+AXES = {'vaccine': 'Vaccine', 'dose': 'Dose', 'age': 'Age', 'birth_year': 'Birth Year', 'geo': 'Geographic Area'}
+
+
+class EstimateCube(object):
+    def __init__(self, df):
+        """
+        Dense float32 array of Estimate (%) over vaccine x dose x age x birth
+        year x geographic area, built from the birth year rows of the data
+        (NaN where the data has no estimate). Rows missing a value on any axis
+        are left out. Answers batch queries with one
+        NumPy indexing operation instead of one pandas filter per selection.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            Vaccination data with the compact dtypes from `Vaccine.read_data`.
+
+        Raises
+        ------
+        ValueError
+            If two rows have the same vaccine, dose, age, birth year and
+            geographic area (one cell cannot hold both estimates).
+        """
+        # birth year rows only (sociodemographic rows have no age or birth year); a missing label would get code -1 (last label)
+        rows = df.dropna(subset=list(AXES.values()))
+
+        self.labels = {}
+        self.positions = {}
+        codes = []
+        for name, col in AXES.items():
+            if name == 'birth_year':
+                labels = sorted(int(year) for year in rows[col].unique())
+                col_codes = np.searchsorted(labels, rows[col].to_numpy(dtype='int64'))
+            else:
+                # only categories that appear in birth year rows
+                labels = list(rows[col].cat.remove_unused_categories().cat.categories)
+                col_codes = pd.Categorical(rows[col], categories=labels).codes
+            self.labels[name] = labels
+            self.positions[name] = {label: i for i, label in enumerate(labels)}
+            codes.append(col_codes)
+
+        shape = [len(labels) for labels in self.labels.values()]
+        cells = np.ravel_multi_index(codes, shape)
+        if len(np.unique(cells)) != len(cells):
+            raise ValueError('Data has more than one estimate for the same vaccine, dose, age, birth year and geographic area')
+
+        self.values = np.full(shape, np.nan, dtype=np.float32)
+        self.values.flat[cells] = rows['Estimate (%)'].to_numpy(dtype=np.float32)
+
+    def query(self, vaccine=None, dose=None, age=None, birth_year=None, geo=None):
+        """
+        Return estimates for a batch of selections in one vectorized call.
+
+        Each argument selects labels on one axis: None keeps every label, a
+        list keeps the listed labels (in that order), and a single label
+        selects it and drops the axis.
+
+        Examples
+        --------
+        Every state's 2020 rate for all vaccine/dose/age combinations:
+            cube.query(birth_year=2020, geo=states)  -> vaccine x dose x age x geo
+        Birth year trends for several geographic areas:
+            cube.query('DTaP', '≥4 Doses', '24 Months', geo=['United States', 'Texas'])  -> birth_year x geo
+
+        Returns
+        -------
+        values : numpy.ndarray
+            float32 array with one dimension per axis that was not a single label.
+        axes : dict
+            Axis name -> labels, for each remaining dimension (in order).
+        """
+        selections = {'vaccine': vaccine, 'dose': dose, 'age': age, 'birth_year': birth_year, 'geo': geo}
+
+        values = self.values
+        axes = {}
+        # index last axis first, so dropping an axis never moves the axes still to be indexed
+        for axis, name in reversed(list(enumerate(AXES))):
+            selection = selections[name]
+            if selection is None:
+                axes[name] = self.labels[name]
+                continue
+            if isinstance(selection, (list, tuple, np.ndarray, pd.Index)):
+                index = np.array([self.positions[name][label] for label in selection], dtype=np.intp)
+                axes[name] = list(selection)
+            else:
+                index = self.positions[name][selection]
+            values = values[(slice(None),) * axis + (index,)]
+
+        axes = {name: axes[name] for name in AXES if name in axes}
+        return values, axes
+
+    def to_frame(self, values, axes, dropna=True):
+        """
+        Convert a `query` result into a long DataFrame (one row per cell),
+        e.g. for bulk export.
+        """
+        if not axes:
+            return pd.DataFrame({'Estimate (%)': [round(float(values), 1)]})
+
+        index = pd.MultiIndex.from_product(list(axes.values()), names=[AXES[name] for name in axes])
+        # float32 values converted back to their one-decimal display values
+        estimates = np.asarray(values, dtype=np.float64).ravel().round(1)
+        df = pd.DataFrame({'Estimate (%)': estimates}, index=index).reset_index()
+        if dropna:
+            df = df[df['Estimate (%)'].notna()].reset_index(drop=True)
+        return df
@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict
+
+
+class FigureCache(object):
+    def __init__(self, max_entries=256):
+        """
+        Least-recently-used cache of built chart figures, safe to share
+        between sessions (Streamlit runs each session in its own thread).
+
+        Parameters
+        ----------
+        max_entries : int
+            Number of figures kept. The least recently used figure is evicted
+            when the cache is full.
+        """
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        """
+        Return the cached figure for `key`, or call `build()` to create it and
+        add it to the cache.
+
+        Parameters
+        ----------
+        key : tuple
+            Chart name plus the filter selections the chart depends on.
+        build : callable
+            Function with no arguments that builds the figure.
+        """
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            self.misses += 1
+
+        # build outside lock so other sessions are not blocked (two sessions may occasionally build the same figure)
+        figure = build()
+
+        with self.lock:
+            self.entries[key] = figure
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+        return figure
+
+    def stats(self):
+        """
+        Return hit/miss counters and the number of cached figures.
+        """
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'entries': len(self.entries), 'max_entries': self.max_entries}
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
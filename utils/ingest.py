@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import pandas as pd
+
+# columns read from the raw CDC export (Vaccination Coverage among Young Children (0-35 Months))
+RAW_COLUMNS = ['Vaccine', 'Dose', 'Geography Type', 'Geography', 'Birth Year/Birth Cohort',
+               'Dimension Type', 'Dimension', 'Estimate (%)', '95% CI (%)', 'Sample Size']
+
+# raw column holding either a birth year (e.g. 2020) or a birth cohort (e.g. 2016-2019); also used to split data into partitions
+PARTITION_COLUMN = 'Birth Year/Birth Cohort'
+
+# "Dimension Type" values pivoted into their own columns (raw value -> app column name)
+DIMENSION_COLUMNS = {'Age': 'Age',
+                     'Race and Ethnicity': 'Race and Ethnicity',
+                     'Poverty': 'Poverty Level',
+                     'Insurance Coverage': 'Health Insurance Coverage',
+                     'Urbanicity': 'Urbanicity'}
+
+# blank doses are filled per vaccine following the CDC documentation (e.g. "Combined 7 Series" rows represent the full series)
+# a blank dose for any other vaccine stops ingestion, so a new case is added here instead of being guessed
+DOSE_FILLS = {'Combined 7 Series': 'Full Series'}
+
+# two-letter abbreviations used by the choropleth map
+STATE_ABBREVIATIONS = {
+    'Alabama': 'AL', 'Alaska': 'AK', 'Arizona': 'AZ', 'Arkansas': 'AR', 'California': 'CA', 'Colorado': 'CO',
+    'Connecticut': 'CT', 'Delaware': 'DE', 'District of Columbia': 'DC', 'Florida': 'FL', 'Georgia': 'GA',
+    'Hawaii': 'HI', 'Idaho': 'ID', 'Illinois': 'IL', 'Indiana': 'IN', 'Iowa': 'IA', 'Kansas': 'KS',
+    'Kentucky': 'KY', 'Louisiana': 'LA', 'Maine': 'ME', 'Maryland': 'MD', 'Massachusetts': 'MA',
+    'Michigan': 'MI', 'Minnesota': 'MN', 'Mississippi': 'MS', 'Missouri': 'MO', 'Montana': 'MT',
+    'Nebraska': 'NE', 'Nevada': 'NV', 'New Hampshire': 'NH', 'New Jersey': 'NJ', 'New Mexico': 'NM',
+    'New York': 'NY', 'North Carolina': 'NC', 'North Dakota': 'ND', 'Ohio': 'OH', 'Oklahoma': 'OK',
+    'Oregon': 'OR', 'Pennsylvania': 'PA', 'Rhode Island': 'RI', 'South Carolina': 'SC', 'South Dakota': 'SD',
+    'Tennessee': 'TN', 'Texas': 'TX', 'Utah': 'UT', 'Vermont': 'VT', 'Virginia': 'VA', 'Washington': 'WA',
+    'West Virginia': 'WV', 'Wisconsin': 'WI', 'Wyoming': 'WY'}
+
+# columns of the app-ready data set, in order
+CLEAN_COLUMNS = ['Vaccine', 'Dose', 'Geography Type', 'Geographic Area', 'Birth Year', 'Birth Cohort',
+                 *DIMENSION_COLUMNS.values(), 'Estimate (%)', '95% CI (%)', 'Sample Size', 'State']
+
+MANIFEST_FILE = 'manifest.json'
+
+# partition of rows with a blank "Birth Year/Birth Cohort" (kept, so no row is dropped without notice)
+BLANK_PARTITION = ''
+
+
+def read_raw(raw_path, chunksize):
+    """
+    Stream the raw CDC export as DataFrame chunks (all columns as strings).
+    """
+    return pd.read_csv(raw_path, usecols=RAW_COLUMNS, dtype=str, chunksize=chunksize)
+
+
+def clean_chunk(chunk):
+    """
+    Apply the cleaning steps described in the README to one chunk of raw rows.
+
+    - pivot "Dimension Type"/"Dimension" into one column per dimension type
+    - split "Birth Year/Birth Cohort" into "Birth Year" and "Birth Cohort"
+    - drop rows without "Estimate (%)"
+    - fill blank doses (see `DOSE_FILLS`)
+    - rename columns ("Geography" -> "Geographic Area", ...)
+    - add two-letter "State" abbreviation
+    """
+    estimate = pd.to_numeric(chunk['Estimate (%)'], errors='coerce')
+    chunk = chunk[estimate.notna()]
+
+    dose = chunk['Dose'].fillna(chunk['Vaccine'].map(DOSE_FILLS))
+    if dose.isna().any():
+        vaccines = sorted(str(vacc) for vacc in chunk.loc[dose.isna(), 'Vaccine'].unique())
+        raise ValueError(f'Blank dose for vaccine(s) without a fill in DOSE_FILLS: {", ".join(vaccines)}')
+
+    clean = pd.DataFrame({'Vaccine': chunk['Vaccine'],
+                          'Dose': dose,
+                          'Geography Type': chunk['Geography Type'],
+                          'Geographic Area': chunk['Geography']})
+
+    birth = chunk[PARTITION_COLUMN].str.strip()
+    is_year = birth.str.fullmatch(r'\d{4}').fillna(False).astype(bool)
+    clean['Birth Year'] = pd.to_numeric(birth.where(is_year)).astype('Int16')
+    clean['Birth Cohort'] = birth.where(~is_year)
+
+    for dimension_type, col in DIMENSION_COLUMNS.items():
+        clean[col] = chunk['Dimension'].where(chunk['Dimension Type'] == dimension_type)
+
+    clean['Estimate (%)'] = estimate[estimate.notna()]
+    clean['95% CI (%)'] = chunk['95% CI (%)']
+    clean['Sample Size'] = chunk['Sample Size']
+    clean['State'] = chunk['Geography'].map(STATE_ABBREVIATIONS)
+
+    return clean[CLEAN_COLUMNS]
+
+
+def partition_keys(chunk):
+    """
+    Return the partition of each raw row (blank values -> `BLANK_PARTITION`),
+    used the same way when partitions are hashed and when they are cleaned.
+    """
+    return chunk[PARTITION_COLUMN].fillna(BLANK_PARTITION).astype(str).to_numpy()
+
+
+def partition_digests(raw_path, chunksize):
+    """
+    Stream the raw file once and return a digest of the raw rows of each
+    partition (birth year or birth cohort), in order of first appearance.
+    """
+    hashers = {}
+    for chunk in read_raw(raw_path, chunksize):
+        row_hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        for part, positions in chunk.groupby(partition_keys(chunk), sort=False).indices.items():
+            hashers.setdefault(part, hashlib.sha1()).update(row_hashes[positions].tobytes())
+    return {part: hasher.hexdigest() for part, hasher in hashers.items()}
+
+
+def partition_file(state_dir, part):
+    return os.path.join(state_dir, 'partitions', (re.sub(r'[^0-9A-Za-z_-]', '_', part) or '_blank') + '.csv')
+
+
+def ingest(raw_path, out_path, state_dir, chunksize=50_000, force=False):
+    """
+    Build the app-ready data set from the raw CDC export.
+
+    The raw file is streamed in chunks, so memory use depends on `chunksize`
+    rather than the size of the file. Cleaned rows are stored per partition
+    (birth year or birth cohort) in `state_dir`, together with a digest of
+    each partition's raw rows. When the CDC publishes an update, only new or
+    changed partitions are cleaned again; the output file is then assembled
+    from the partition files.
+
+    Parameters
+    ----------
+    raw_path : str
+        Raw CDC CSV export.
+    out_path : str
+        App-ready CSV file to write.
+    state_dir : str
+        Directory for partition files and the manifest of partition digests.
+    chunksize : int
+        Number of raw rows processed at a time.
+    force : bool
+        Reprocess every partition.
+
+    Returns
+    -------
+    dict
+        Lists of partitions that were 'processed', 'unchanged' and 'removed'.
+    """
+    manifest_path = os.path.join(state_dir, MANIFEST_FILE)
+    manifest = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    # first pass: find new or changed partitions
+    digests = partition_digests(raw_path, chunksize)
+    changed = [part for part, digest in digests.items()
+               if manifest.get(part) != digest or not os.path.exists(partition_file(state_dir, part))]
+    removed = [part for part in manifest if part not in digests]
+
+    result = {'processed': changed, 'unchanged': [part for part in digests if part not in changed], 'removed': removed}
+    if not changed and not removed and os.path.exists(out_path):
+        return result
+
+    # second pass: clean rows of changed partitions only, appending each chunk to its partition file
+    os.makedirs(os.path.join(state_dir, 'partitions'), exist_ok=True)
+    for part in changed + removed:
+        if os.path.exists(partition_file(state_dir, part)):
+            os.remove(partition_file(state_dir, part))
+
+    if changed:
+        changed_set = set(changed)
+        for chunk in read_raw(raw_path, chunksize):
+            chunk = chunk[pd.Series(partition_keys(chunk), index=chunk.index).isin(changed_set)]
+            if chunk.empty:
+                continue
+            clean = clean_chunk(chunk)
+            for part, positions in clean.groupby(partition_keys(chunk.loc[clean.index]), sort=False).indices.items():
+                path = partition_file(state_dir, part)
+                clean.iloc[positions].to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+
+        # partitions where every row was dropped (no estimate) still get an (empty) file
+        for part in changed:
+            if not os.path.exists(partition_file(state_dir, part)):
+                pd.DataFrame(columns=CLEAN_COLUMNS).to_csv(partition_file(state_dir, part), index=False)
+
+    # assemble output from partition files (streamed, never loaded as a whole), then swap it in
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'w', newline='') as out:
+        out.write(','.join(CLEAN_COLUMNS) + '\n')
+        for part in digests:
+            with open(partition_file(state_dir, part), newline='') as f:
+                f.readline()
+                shutil.copyfileobj(f, out)
+    os.replace(tmp_path, out_path)
+
+    with open(manifest_path, 'w') as f:
+        json.dump(digests, f, indent=1)
+
+    return result
+
+
+if __name__ == '__main__':
+    # usage: python -m utils.ingest raw_path [out_path] [--columnar] [--force]
+    # --columnar also writes the memory-mapped copy used by the app (see utils/columnar.py)
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    raw_path = args[0]
+    out_path = args[1] if len(args) > 1 else './data/child_vaccination_data_cleaned.csv'
+    state_dir = os.path.join(os.path.dirname(out_path), 'ingest_state')
+
+    result = ingest(raw_path, out_path, state_dir, force='--force' in sys.argv)
+    print(f"Processed {len(result['processed'])} partitions, {len(result['unchanged'])} unchanged, "
+          f"{len(result['removed'])} removed -> {out_path}")
+
+    if '--columnar' in sys.argv:
+        from vaccine import Vaccine
+        from utils.columnar import write_columnar
+        write_columnar(Vaccine.read_data(out_path), os.path.splitext(out_path)[0])
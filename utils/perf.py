@@ -0,0 +1,137 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import nullcontext
+
+# timing is recorded only when environment variable VACCINE_PERF is set (e.g. VACCINE_PERF=1 streamlit run app.py)
+ENABLED = os.environ.get('VACCINE_PERF', '') not in ('', '0')
+
+# number of recent timings kept per span name for percentiles
+RECENT_SIZE = 500
+
+# spans are written as one JSON line per rerun
+logger = logging.getLogger('vaccine.perf')
+if ENABLED and not logger.handlers:
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# returned by span() when timing is off, so instrumented code only pays for one function call
+NULL_SPAN = nullcontext()
+
+recent = defaultdict(lambda: deque(maxlen=RECENT_SIZE))
+recent_lock = threading.Lock()
+
+# most recent size (bytes) of data sent to the browser for each name (e.g. serialized chart figure)
+last_bytes = {}
+
+# spans of the rerun running in the current thread (Streamlit runs each session's script in its own thread)
+current = threading.local()
+
+
+class Span(object):
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def span(name):
+    """
+    Return a context manager that times the code inside it as `name`.
+
+    Usage: `with perf.span('map.figure'): ...`
+    """
+    if not ENABLED:
+        return NULL_SPAN
+    return Span(name)
+
+
+def record(name, seconds):
+    """
+    Add a timing to the recent timings for `name` and to the current rerun.
+    """
+    with recent_lock:
+        recent[name].append(seconds)
+
+    spans = getattr(current, 'spans', None)
+    if spans is not None:
+        spans.append((name, seconds))
+
+
+def add_bytes(name, size):
+    """
+    Record the size (bytes) of data sent to the browser as `name` in the
+    current rerun (e.g. a serialized chart figure).
+    """
+    if not ENABLED:
+        return
+
+    last_bytes[name] = size
+
+    sizes = getattr(current, 'bytes', None)
+    if sizes is not None:
+        sizes[name] = sizes.get(name, 0) + size
+
+
+def start_rerun():
+    """
+    Start collecting spans for a new rerun in the current thread.
+    """
+    if ENABLED:
+        current.spans = []
+        current.bytes = {}
+        current.start = time.perf_counter()
+
+
+def end_rerun(**fields):
+    """
+    Write the spans of the current rerun as one JSON log line.
+
+    Parameters
+    ----------
+    **fields
+        Extra values added to the log line (e.g. selected tab).
+    """
+    spans = getattr(current, 'spans', None)
+    if not ENABLED or spans is None:
+        return
+
+    total = time.perf_counter() - current.start
+    sizes = current.bytes
+    current.spans = current.bytes = None
+    record('rerun', total)
+
+    logger.info(json.dumps({'event': 'rerun', 'time': round(time.time(), 3), 'total_ms': round(total * 1000, 2),
+                            'spans': [[name, round(seconds * 1000, 2)] for name, seconds in spans],
+                            'bytes': sizes, **fields},
+                           default=str))
+
+
+def percentiles():
+    """
+    Return count and p50/p90/p99/max (ms) of recent timings for each span name.
+    """
+    with recent_lock:
+        timings = {name: sorted(times) for name, times in recent.items()}
+
+    def pct(times, p):
+        return round(times[min(len(times) - 1, int(p / 100 * len(times)))] * 1000, 2)
+
+    return [{'span': name, 'count': len(times), 'p50_ms': pct(times, 50), 'p90_ms': pct(times, 90),
+             'p99_ms': pct(times, 99), 'max_ms': round(times[-1] * 1000, 2)}
+            for name, times in sorted(timings.items()) if times]
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+
+def scale_data(df, geo_copies=10, year_copies=1, seed=0):
+    """
+    Build a synthetic data set with the same schema as the (compact, cleaned)
+    vaccination data but `geo_copies * year_copies` times as many rows.
+
+    Each geo copy adds a new geographic area for every original one (copy 0
+    keeps the original names, later copies are named e.g. "Texas #2" and have
+    no state abbreviation). Each year copy adds a block of earlier birth years
+    and birth cohorts (e.g. 2001-2010 before 2011-2020). Estimates get random
+    noise so copies are not identical.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Data with the compact dtypes from `Vaccine.read_data`.
+    geo_copies : int
+        Number of copies of each geographic area.
+    year_copies : int
+        Number of copies of the birth year range.
+    seed : int
+        Seed for the estimate noise.
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    n = len(df)
+    geo_copy = np.tile(np.repeat(np.arange(geo_copies), n), year_copies)
+    year_copy = np.repeat(np.arange(year_copies), n * geo_copies)
+    copies = geo_copies * year_copies
+
+    birth_years = df['Birth Year'].dropna()
+    year_span = int(birth_years.max() - birth_years.min() + 1) if len(birth_years) else 0
+
+    def shift_cohort(cohort, y):
+        # '2014-2017' -> '2004-2007' for year copy 1 of a 10-year span
+        return '-'.join(str(int(year) - year_span * y) for year in cohort.split('-'))
+
+    data = {}
+    for col, values in df.items():
+        if col == 'Geographic Area':
+            categories = values.cat.categories
+            labels = [c if g == 0 else f'{c} #{g}' for g in range(geo_copies) for c in categories]
+            data[col] = copy_codes(values, copies, labels, geo_copy * len(categories))
+        elif col == 'Birth Cohort':
+            categories = values.cat.categories
+            labels = [shift_cohort(c, y) for y in range(year_copies) for c in categories]
+            data[col] = copy_codes(values, copies, labels, year_copy * len(categories))
+        elif col == 'State':
+            # synthetic geographic areas are not states
+            codes = np.where(geo_copy == 0, np.tile(values.cat.codes.to_numpy(), copies), -1)
+            data[col] = pd.Categorical.from_codes(codes, categories=values.cat.categories)
+        elif col == 'Birth Year':
+            years = np.tile(values.to_numpy(dtype='float64', na_value=np.nan), copies) - year_span * year_copy
+            data[col] = pd.Series(years).astype(values.dtype)
+        elif col == 'Estimate (%)':
+            # original rows (first copy) keep their estimates
+            noise = np.random.default_rng(seed).normal(0, 2, n * copies)
+            noise[:n] = 0
+            estimates = np.tile(values.to_numpy(), copies) + noise
+            data[col] = np.clip(estimates, 0, 100).round(1).astype(values.dtype)
+        elif isinstance(values.dtype, pd.CategoricalDtype):
+            data[col] = pd.Categorical.from_codes(np.tile(values.cat.codes.to_numpy(), copies), categories=values.cat.categories)
+        else:
+            data[col] = np.tile(values.to_numpy(), copies)
+
+    return pd.DataFrame(data)
+
+
+def copy_codes(values, copies, labels, offsets):
+    """
+    Repeat the codes of categorical `values` `copies` times, adding `offsets`
+    so each copy points at its own block of `labels` (missing values stay missing).
+    """
+    codes = np.tile(values.cat.codes.to_numpy().astype('int32'), copies)
+    codes = np.where(codes >= 0, codes + offsets, -1)
+    return pd.Categorical.from_codes(codes, categories=labels)
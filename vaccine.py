@@ -1,18 +1,45 @@
 # custom module for vaccine app
+import os
+import threading
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
+from utils.columnar import read_columnar
+from utils.figure_cache import FigureCache
+from utils.cube import EstimateCube
+from utils import perf
 
-class Vaccine():
+# low-cardinality text columns stored as categoricals (filters then compare small integer codes instead of strings)
+CATEGORY_COLUMNS = ['Vaccine', 'Dose', 'Age', 'Geographic Area', 'Birth Cohort', 'State',
+                    'Race and Ethnicity', 'Poverty Level', 'Health Insurance Coverage', 'Urbanicity']
+
+# compact dtypes for every column used by the app (other columns in the data file are not loaded)
+DATA_DTYPES = {**{col: 'category' for col in CATEGORY_COLUMNS}, 'Birth Year': 'Int16', 'Estimate (%)': 'float32'}
+
+# columns used as sub-keys of the query index within each (Vaccine, Dose, Age) group
+INDEX_SUB_KEYS = ['Birth Year', 'Birth Cohort', 'Geographic Area']
+
+# four-year birth cohorts (the only birth cohorts with sociodemographic data)
+SOC_DEM_COHORTS = ['2014-2017', '2016-2019']
+
+# sociodemographic factors for bar chart filter
+SOC_DEM_OPTIONS = ('Race and Ethnicity', 'Poverty Level', 'Health Insurance Coverage', 'Urbanicity')
+
+# sidebar filters selected when app first opens (option index for vaccine and geographic area filters)
+DEFAULT_VACC_INDEX = 1
+DEFAULT_GEO_INDEX = 1
+
+def display_data(df_chart):
     '''
-    Class properties store data set, store filter options for vaccines and geographic areas, and store user-selected option for each filter
-    Class methods read in (and fix) data set, read in geographic area data, generate dynamic filter options dependent on other filters, and generate visualizations
+    Return chart subset with Estimate (%) converted from compact float32 back to its one-decimal display value
     '''
-    def __init__(self, df_csv):
-        self.data = self.fix_data(df_csv)
-        self.vacc_options = self.get_vacc_options()
-        self.geo_options = self.get_geo_options()
+    return df_chart.assign(**{'Estimate (%)': df_chart['Estimate (%)'].astype('float64').round(1)})
+
+class Selection():
+    '''
+    Class properties store user-selected option for each filter (one object per session rerun, kept separate from shared Vaccine data)
+    '''
+    def __init__(self):
         self.vacc_option = None
         self.dose_option = None
         self.age_option = None
@@ -20,37 +47,174 @@ class Vaccine():
         self.soc_dem_option = None
         self.soc_dem_dose = None
 
-    @st.cache_data
-    def fix_data(_self, df_csv):
+class Vaccine():
+    '''
+    Class properties store data set, query index, filter options for vaccines, dependent filters, and geographic areas, and cache of chart figures
+    Class methods read in (and fix) data set, read in geographic area data, generate dynamic filter options dependent on other filters, and generate visualizations
+    One Vaccine object is created per process and shared by every session, so its properties are built once and never changed afterwards
+    User-selected filter options are passed to methods in a Selection object
+    '''
+    def __init__(self, df_csv):
+        with perf.span('fix_data'):
+            self.data = self.fix_data(df_csv)
+        with perf.span('build_index'):
+            self.index = self.build_index()
+        with perf.span('build_filter_options'):
+            self.filter_options = self.build_filter_options()
+        self.vacc_options = self.get_vacc_options()
+        self.geo_options = self.get_geo_options()
+
+        # rendered chart figures shared by all sessions, keyed by chart and filter selections
+        self.figure_cache = FigureCache()
+
+        # dense estimate cube for batch queries (optional, only built when first requested by get_cube)
+        self.cube = None
+        self.cube_lock = threading.Lock()
+
+    @staticmethod
+    def read_data(path):
+        '''
+        Read data file with compact dtypes so text columns are never held as full Python strings
+        Path can be a columnar data directory (memory-mapped, only app columns loaded) or a CSV file (parsed)
+        '''
+        if os.path.isdir(path):
+            return read_columnar(path, columns = list(DATA_DTYPES))
+
+        return pd.read_csv(path, usecols = lambda col: col in DATA_DTYPES, dtype = DATA_DTYPES)
+
+    def fix_data(self, df_csv):
         '''
         Perform data cleaning for one data type as result of reading in data and return cleaned CSV back to self
         '''
         try:
-            # convert Birth Year into string (otherwise will display as float value in charts)
-            # first convert into nullable Integer and then into String
-            df_csv['Birth Year'] = np.where(pd.isnull(df_csv['Birth Year']), df_csv['Birth Year'], df_csv['Birth Year'].astype('Int64').astype(str))
-
-            return df_csv
+            # compact representation: categoricals for text columns, nullable small integer for Birth Year, float32 for Estimate (%)
+            # Birth Year stays numeric in memory and only becomes a label when the line graph is drawn
+            # columns already loaded with these dtypes (see read_data) are left as they are, so memory-mapped data is not copied
+            # columns not used by the app are dropped
+            data_columns = [col for col in df_csv.columns if col in DATA_DTYPES]
+            df_data = df_csv if data_columns == list(df_csv.columns) else df_csv[data_columns]
+
+            convert_dtypes = {col: DATA_DTYPES[col] for col in data_columns if str(df_csv[col].dtype) != DATA_DTYPES[col]}
+            if convert_dtypes:
+                df_data = df_data.astype(convert_dtypes)
+
+            return df_data
         
         except:
             st.write('Error processing vaccine data file')
             return None
     
-    @st.cache_data
-    def get_vacc_options(_self):
+    def build_index(self):
+        '''
+        Build query index once when data loaded so charts look up their rows instead of scanning the whole data set
+        Index structure = (vaccine, dose) -> age -> sub-key column -> value -> row positions (ages missing from data stored as None)
+        '''
+        try:
+            index = {}
+
+            # one pass over data per sub-key column, grouping rows by vaccine, dose, age, and sub-key value
+            for col in INDEX_SUB_KEYS:
+                groups = self.data.groupby(['Vaccine', 'Dose', 'Age', col], observed = True, sort = False, dropna = False).indices
+
+                for (vacc, dose, age, value), positions in groups.items():
+                    if pd.isna(value):
+                        continue
+                    age = None if pd.isna(age) else age
+                    age_index = index.setdefault((vacc, dose), {}).setdefault(age, {sub_key: {} for sub_key in INDEX_SUB_KEYS})
+                    # int32 positions: half the memory of int64 (index is private memory in every process, unlike memory-mapped data)
+                    age_index[col][value] = positions.astype(np.int32)
+
+            return index
+
+        except:
+            st.write('Error building vaccine data index')
+            return None
+
+    def build_filter_options(self):
+        '''
+        Build filter dependency tables once when data loaded so dependent sidebar filters only need a dictionary lookup
+        Tables = vaccine -> doses, (vaccine, dose) -> ages, and vaccine -> sociodemographic doses
+        Options keep the order they first appear in data set (same order as unique())
+        '''
+        try:
+            def option_table(df_options, key_cols, option_col):
+                table = {}
+                for row in df_options[key_cols + [option_col]].drop_duplicates().itertuples(index = False):
+                    key = row[0] if len(key_cols) == 1 else tuple(row[:-1])
+                    table.setdefault(key, []).append(row[-1])
+                return {key: tuple(options) for key, options in table.items()}
+
+            # age options only include birth year data; sociodemographic doses only include the 2 four-year birth cohorts
+            birth_year_data = self.data[self.data['Birth Year'].notna()]
+            soc_dem_data = self.data[self.data['Birth Cohort'].isin(SOC_DEM_COHORTS)]
+
+            filter_options = {'dose': option_table(self.data, ['Vaccine'], 'Dose'),
+                              'age': option_table(birth_year_data, ['Vaccine', 'Dose'], 'Age'),
+                              'soc_dem_dose': option_table(soc_dem_data, ['Vaccine'], 'Dose')}
+
+            return filter_options
+
+        except:
+            st.write('Error generating filter options')
+            return None
+
+    def lookup(self, vacc, dose, ages, sub_filters, columns = None):
+        '''
+        Look up and return data subset for selected vaccine and dose using query index
+        ages = list of age checkpoints to include (None includes all ages)
+        sub_filters = dict of index sub-key column -> list of values to match (rows must match every column)
+        columns = list of columns to return (None returns all columns), so charts only copy the columns they draw
+        Cost depends only on number of rows returned (not size of data set)
+        '''
+        age_index = self.index.get((vacc, dose), {})
+        if ages is None:
+            groups = list(age_index.values())
+        else:
+            groups = [age_index[age] for age in ages if age in age_index]
+
+        group_positions = []
+        for group in groups:
+            positions = None
+            for col, values in sub_filters.items():
+                # values within a column never share rows, so their positions can simply be combined
+                col_positions = [group[col][value] for value in dict.fromkeys(values) if value in group[col]]
+                col_positions = np.concatenate(col_positions) if col_positions else np.array([], dtype = np.int32)
+                positions = col_positions if positions is None else np.intersect1d(positions, col_positions)
+            group_positions.append(positions)
+
+        # sort positions so subset keeps same row order as original data
+        positions = np.sort(np.concatenate(group_positions)) if group_positions else np.array([], dtype = np.int32)
+
+        if columns is None:
+            return self.data.take(positions)
+
+        return pd.DataFrame({col: self.data[col].take(positions) for col in columns})
+
+    def get_cube(self):
+        '''
+        Get and return dense estimate cube (vaccine x dose x age x birth year x geographic area) for batch queries
+        Built on first call and then shared, e.g. vax.get_cube().query(birth_year = 2020, geo = ['Texas', 'Ohio'])
+        '''
+        with self.cube_lock:
+            if self.cube is None:
+                with perf.span('build_cube'):
+                    self.cube = EstimateCube(self.data)
+
+        return self.cube
+
+    def get_vacc_options(self):
         '''
         Get and return vaccine options for filter
         '''
         try:
-            vacc_options = tuple(_self.data['Vaccine'].unique())
+            vacc_options = tuple(self.data['Vaccine'].unique())
             return vacc_options
         
         except:
             st.write('Error generating vaccine options')
             return None            
 
-    @st.cache_data
-    def get_geo_options(_self):
+    def get_geo_options(self):
         '''
         Get and return geographic area options for chart filter
         Order contained in separate csv file created from dataset because preferred order is unique (not strictly alphabetical)
@@ -74,131 +238,231 @@ class Vaccine():
             st.write('Error reading geographic data file')
             return None            
 
-    def get_dose_options(self):
+    def get_dose_options(self, sel):
         '''
         Get and return dose options for dose selection filter based on selected vaccine
         '''
-        filter_vacc = (self.data['Vaccine'] == self.vacc_option)
-        dose_options = tuple(self.data[filter_vacc]['Dose'].unique())
+        with perf.span('get_dose_options'):
+            dose_options = self.filter_options['dose'].get(sel.vacc_option, ())
 
         return dose_options
 
-    def get_age_options(self):
+    def get_age_options(self, sel):
         '''
         Get and return age options for age selection filter based on selected vaccine and dose
         '''   
-        filter_age = (self.data['Vaccine'] == self.vacc_option) & (self.data['Dose'] == self.dose_option) & (self.data['Birth Year'].notna())
-
-        age_options = tuple(self.data[filter_age]['Age'].unique())
+        with perf.span('get_age_options'):
+            age_options = self.filter_options['age'].get((sel.vacc_option, sel.dose_option), ())
 
         return age_options
 
-    def get_soc_dem_dose_options(self):
+    def get_soc_dem_dose_options(self, sel):
         '''
         Get and return dose options and default option index for sociodemographic chart filter
         '''
-        # apply selected vaccine filter to generate data subset that only includes the 2 four-year birth cohorts (which have sociodemographic data)
-        filter_soc_dem_data = (self.data['Vaccine'] == self.vacc_option) & ((self.data['Birth Cohort'] == '2014-2017') | (self.data['Birth Cohort'] == '2016-2019'))
+        with perf.span('get_soc_dem_dose_options'):
+            # get available doses for vaccine within sociodemographic data (might be subset of doses for selected vaccine)
+            soc_dem_dose_options = self.filter_options['soc_dem_dose'].get(sel.vacc_option, ())
+
+            # if available, select previous dose; otherwise default to first available dose option
+            if sel.dose_option in soc_dem_dose_options:
+                dose_index = soc_dem_dose_options.index(sel.dose_option)
+            else:
+                dose_index = 0
+        
+        return soc_dem_dose_options, dose_index
 
-        soc_dem_data = self.data[filter_soc_dem_data]
+    def default_selection(self, vacc_option = None):
+        '''
+        Get and return Selection with sidebar defaults (same options app shows before user changes any filter)
+        Vaccine defaults to sidebar default unless vacc_option given; dependent filters default to their first option
+        '''
+        sel = Selection()
+        sel.vacc_option = vacc_option if vacc_option is not None else self.vacc_options[DEFAULT_VACC_INDEX]
+        sel.dose_option = next(iter(self.get_dose_options(sel)), None)
+        sel.age_option = next(iter(self.get_age_options(sel)), None)
+        sel.geo_option = self.geo_options[DEFAULT_GEO_INDEX]
+        sel.soc_dem_option = SOC_DEM_OPTIONS[0]
+        soc_dem_dose_options, dose_index = self.get_soc_dem_dose_options(sel)
+        sel.soc_dem_dose = soc_dem_dose_options[dose_index] if soc_dem_dose_options else None
+
+        return sel
+
+    def get_figure(self, chart, sel):
+        '''
+        Get and return chart figure ('map', 'line', or 'bar') for selection from figure cache (built only if selection not cached)
+        Cache key only includes the filters used by that chart
+        '''
+        match chart:
+            case 'map':
+                key = ('map', sel.vacc_option, sel.dose_option, sel.age_option)
+                build = self.build_choropleth_map
+            case 'line':
+                key = ('line', sel.vacc_option, sel.dose_option, sel.age_option, sel.geo_option)
+                build = self.build_line_graph
+            case 'bar':
+                key = ('bar', sel.vacc_option, sel.soc_dem_dose, sel.geo_option, sel.soc_dem_option)
+                build = self.build_bar_chart
+
+        return self.figure_cache.get_or_build(key, lambda: build(sel))
+
+    def plot_figure(self, chart, fig):
+        '''
+        Show chart figure (serialized and sent to browser)
+        Numeric data is sent as compact typed arrays (base64) by plotly 6+, instead of one JSON number per value
+        With instrumentation turned on, size of serialized figure is also recorded for this rerun (costs one extra serialization)
+        '''
+        with perf.span(chart + '.plotly_chart'):
+            st.plotly_chart(fig, use_container_width=True, config = {'displayModeBar': False})
 
-        # get available doses for vaccine within sociodemographic data (might be subset of doses for selected vaccine)
-        soc_dem_dose_options = tuple(soc_dem_data['Dose'].unique())
+        if perf.ENABLED:
+            import plotly.io as pio
+            perf.add_bytes(chart, len(pio.to_json(fig, validate = False).encode()))
 
-        # if available, select previous dose; otherwise default to first available dose option
-        if self.dose_option in soc_dem_dose_options:
-            dose_index = soc_dem_dose_options.index(self.dose_option)
-        else:
-            dose_index = 0
-        
-        return soc_dem_dose_options, dose_index
+        return
+
+    def warm_up(self):
+        '''
+        Pre-build figures for default sidebar selections of every vaccine (before first visitor arrives)
+        Also imports plotly and serializes one figure, so first chart shown does not pay for loading plotly modules either
+        '''
+        import plotly.io as pio
+
+        with perf.span('warm_up'):
+            fig = None
+            for vacc in self.vacc_options:
+                sel = self.default_selection(vacc)
+                if sel.dose_option is not None and sel.age_option is not None:
+                    fig = self.get_figure('map', sel)
+                    self.get_figure('line', sel)
+                if sel.soc_dem_dose is not None:
+                    self.get_figure('bar', sel)
+
+            # st.plotly_chart converts figure to JSON, which loads plotly's validators and encoder on first use
+            if fig is not None:
+                pio.to_json(fig)
+
+        return
 
-    def show_choropleth_map(self):
+    def build_choropleth_map(self, sel):
+        '''
+        Build and return choropleth map figure for selected vaccine, dose, and age checkpoint
+        '''
+        # look up selected filters in index to generate data subset for choropleth map (then keep only states)
+        # only columns drawn by chart are copied and passed to plotly (rounded to display precision by display_data)
+        with perf.span('map.filter'):
+            map_data = self.lookup(sel.vacc_option, sel.dose_option, [sel.age_option], {'Birth Year': [2020]}, columns = ['State', 'Estimate (%)'])
+            map_data = display_data(map_data[map_data['State'].notna()])
+
+        # generate choropleth map (plotly express imported on first chart instead of at startup)
+        import plotly.express as px
+        with perf.span('map.figure'):
+            fig_map = px.choropleth(map_data, locations = 'State', color = 'Estimate (%)', color_continuous_scale = 'temps_r', locationmode = 'USA-states', scope = 'usa')
+
+        return fig_map
+
+    def show_choropleth_map(self, sel):
         '''
         Choropleth map displays estimated vaccination rate (%) for each state for Birth Year 2020 (most recent in dataset)
         Data filtered by selections for vaccine, dose, and age checkpoint
         '''
-        # apply selected filters to generate data subset for choropleth map
-        filter_map = (self.data['Vaccine'] == self.vacc_option) & (self.data['Dose'] == self.dose_option) & (self.data['Age'] == self.age_option) & \
-            (self.data['Birth Year'] == '2020') & (self.data['State'].notna())
-        map_data = self.data[filter_map]
-
         # title for choropleth map
-        st.markdown('##### :green[' + self.vacc_option + '] Vaccination Rates by State')
-        st.markdown('##### :green[' + self.dose_option + '] by Age :green[' + self.age_option + '] for Children Born in 2020')
+        st.markdown('##### :green[' + sel.vacc_option + '] Vaccination Rates by State')
+        st.markdown('##### :green[' + sel.dose_option + '] by Age :green[' + sel.age_option + '] for Children Born in 2020')
 
-        # generate and show choropleth map
-        fig_map = px.choropleth(map_data, locations = 'State', color = 'Estimate (%)', color_continuous_scale = 'temps_r', locationmode = 'USA-states', scope = 'usa')
+        # get choropleth map from figure cache (built only if selection not cached) and show it
+        fig_map = self.get_figure('map', sel)
 
-        st.plotly_chart(fig_map, use_container_width=True, config = {'displayModeBar': False})
+        self.plot_figure('map', fig_map)
 
         return
 
-    def show_line_graph(self):
+    def build_line_graph(self, sel):
+        '''
+        Build and return line graph figure for selected vaccine, dose, age checkpoint, and geographic area
+        '''
+        # look up selected filters in index to generate data subset for line graph (include United States for comparison to selected Geographic Area)
+        with perf.span('line.filter'):
+            line_data = self.lookup(sel.vacc_option, sel.dose_option, [sel.age_option], {'Geographic Area': ['United States', sel.geo_option]}, columns = ['Birth Year', 'Estimate (%)', 'Geographic Area'])
+            line_data = display_data(line_data[line_data['Birth Year'].notna()])
+
+            # Birth Year is stored as a number, so convert to string label here (otherwise will display as numeric axis in chart)
+            line_data = line_data.assign(**{'Birth Year': line_data['Birth Year'].astype(str)})
+
+        # generate line graph
+        import plotly.express as px
+        with perf.span('line.figure'):
+            fig_line = px.line(line_data, x = 'Birth Year', y = 'Estimate (%)', color = 'Geographic Area')
+            fig_line.update_layout(yaxis_range=[0,100]) # use 0-100 for y-axis scale
+            fig_line.update_xaxes(type='category') # display all values for x-axis by designating as categories
+
+        return fig_line
+
+    def show_line_graph(self, sel):
         '''
         Line graph displays estimated vaccination rate (%) for each birth year (2011-2020)
         Data filtered by selections for vaccine, dose, age checkpoint, and geographic area
         Estimated vaccination rate for entire United States will also be plotted for comparison
         '''
-        # apply selected filters to generate data subset for line graph (include United States for comparison to selected Geographic Area)
-        filter_line = (self.data['Vaccine'] == self.vacc_option) & (self.data['Dose'] == self.dose_option) & (self.data['Age'] == self.age_option) & \
-            ((self.data['Geographic Area'] == 'United States') | (self.data['Geographic Area'] == self.geo_option)) & (self.data['Birth Year'].notna())
-
-        line_data = self.data[filter_line]
-
         # title for line graph
-        st.markdown('##### :green[' + self.vacc_option + '] Vaccination Rates by Birth Year')
-        st.markdown('##### :green[' + self.dose_option + '] by Age :green[' + self.age_option + '] in :blue[' + self.geo_option +']')
+        st.markdown('##### :green[' + sel.vacc_option + '] Vaccination Rates by Birth Year')
+        st.markdown('##### :green[' + sel.dose_option + '] by Age :green[' + sel.age_option + '] in :blue[' + sel.geo_option +']')
 
-        # generate and show line graph
-        fig_line = px.line(line_data, x = 'Birth Year', y = 'Estimate (%)', color = 'Geographic Area')
-        fig_line.update_layout(yaxis_range=[0,100]) # use 0-100 for y-axis scale
-        fig_line.update_xaxes(type='category') # display all values for x-axis by designating as categories
+        # get line graph from figure cache (built only if selection not cached) and show it
+        fig_line = self.get_figure('line', sel)
 
-        st.plotly_chart(fig_line, use_container_width=True, config = {'displayModeBar': False})
+        self.plot_figure('line', fig_line)
 
         return
 
-    def show_bar_chart(self):
+    def build_bar_chart(self, sel):
+        '''
+        Build and return bar chart figure for selected vaccine, sociodemographic dose, geographic area, and sociodemographic variable
+        '''
+        # look up selected filters in index to generate data subset that only includes four-year birth cohorts (for any age checkpoint)
+        with perf.span('bar.filter'):
+            soc_dem_data = self.lookup(sel.vacc_option, sel.soc_dem_dose, None, {'Birth Cohort': SOC_DEM_COHORTS, 'Geographic Area': [sel.geo_option]}, columns = [sel.soc_dem_option, 'Estimate (%)', 'Birth Cohort'])
+
+            # get filter that matches selection (and get array for preferred order of categories in bar chart)
+            match sel.soc_dem_option:
+                case 'Race and Ethnicity':
+                    filter_soc_dem_var = (soc_dem_data['Race and Ethnicity'].notna())
+                    soc_dem_array = ['Black, Non-Hispanic', 'Hispanic', 'White, Non-Hispanic', 'Other or Multiple Races, Non-Hispanic']
+                case 'Poverty Level':
+                    filter_soc_dem_var = (soc_dem_data['Poverty Level'].notna())
+                    soc_dem_array = ['<133% FPL', '133% to <400% FPL', '>400% FPL']
+                case 'Health Insurance Coverage':
+                    filter_soc_dem_var = (soc_dem_data['Health Insurance Coverage'].notna())
+                    soc_dem_array = ['Uninsured', 'Any Medicaid', 'Private Insurance Only', 'Other']
+                case 'Urbanicity':
+                    filter_soc_dem_var = (soc_dem_data['Urbanicity'].notna())
+                    soc_dem_array = ['Living In a MSA Principal City', 'Living In a MSA Non-Principal City', 'Living In a Non-MSA']
+
+            # apply selected filter to generate data subset for bar chart
+            soc_dem_bar_data = display_data(soc_dem_data[filter_soc_dem_var])
+
+        # generate bar chart
+        import plotly.express as px
+        with perf.span('bar.figure'):
+            fig_bar = px.bar(soc_dem_bar_data, x = sel.soc_dem_option, y = 'Estimate (%)', color = 'Birth Cohort', barmode = 'group')
+            fig_bar.update_layout(yaxis_range=[0,100]) # use 0-100 for y-axis scale
+            fig_bar.update_xaxes(categoryorder = 'array', categoryarray = soc_dem_array) # set preferred order for x-axis categories
+
+        return fig_bar
+
+    def show_bar_chart(self, sel):
         '''
         Bar chart displays estimated vaccination rate (%) for four-year birth cohorts (2014-2017 & 2016-2019)
         Data filtered by selections for vaccine, dose, age checkpoint, geographic area, and sociodemographic variable
         Note: Sociodemographic data only available for four-year birth cohorts (representing age 24 months) and only for certain doses and geographic areas
         '''
-        # apply selected filters to generate data subset that only includes four-year birth cohorts 
-        filter_soc_dem_data = (self.data['Vaccine'] == self.vacc_option) & \
-            ((self.data['Birth Cohort'] == '2014-2017') | (self.data['Birth Cohort'] == '2016-2019')) & \
-            (self.data['Dose'] == self.soc_dem_dose) & (self.data['Geographic Area'] == self.geo_option)
-        
-        soc_dem_data = self.data[filter_soc_dem_data]
-
-        # get filter that matches selection (and get array for preferred order of categories in bar chart)
-        match self.soc_dem_option:
-            case 'Race and Ethnicity':
-                filter_soc_dem_var = (soc_dem_data['Race and Ethnicity'].notna())
-                soc_dem_array = ['Black, Non-Hispanic', 'Hispanic', 'White, Non-Hispanic', 'Other or Multiple Races, Non-Hispanic']
-            case 'Poverty Level':
-                filter_soc_dem_var = (soc_dem_data['Poverty Level'].notna())
-                soc_dem_array = ['<133% FPL', '133% to <400% FPL', '>400% FPL']
-            case 'Health Insurance Coverage':
-                filter_soc_dem_var = (soc_dem_data['Health Insurance Coverage'].notna())
-                soc_dem_array = ['Uninsured', 'Any Medicaid', 'Private Insurance Only', 'Other']
-            case 'Urbanicity':
-                filter_soc_dem_var = (soc_dem_data['Urbanicity'].notna())
-                soc_dem_array = ['Living In a MSA Principal City', 'Living In a MSA Non-Principal City', 'Living In a Non-MSA']
-
-        # apply selected filter to generate data subset for bar chart
-        soc_dem_bar_data = soc_dem_data[filter_soc_dem_var]
-
         # title for bar chart
-        st.markdown('##### :green[' + self.vacc_option + '] Vaccination Rates by :violet[' + self.soc_dem_option + ']')
-        st.markdown('##### :violet[' + self.soc_dem_dose + '] by Age 24 Months* for Two Birth Cohorts in :blue[' + self.geo_option + ']')
+        st.markdown('##### :green[' + sel.vacc_option + '] Vaccination Rates by :violet[' + sel.soc_dem_option + ']')
+        st.markdown('##### :violet[' + sel.soc_dem_dose + '] by Age 24 Months* for Two Birth Cohorts in :blue[' + sel.geo_option + ']')
 
-        # generate and show bar chart
-        fig_bar = px.bar(soc_dem_bar_data, x = self.soc_dem_option, y = 'Estimate (%)', color = 'Birth Cohort', barmode = 'group')
-        fig_bar.update_layout(yaxis_range=[0,100]) # use 0-100 for y-axis scale
-        fig_bar.update_xaxes(categoryorder = 'array', categoryarray = soc_dem_array) # set preferred order for x-axis categories
+        # get bar chart from figure cache (built only if selection not cached) and show it
+        fig_bar = self.get_figure('bar', sel)
 
-        st.plotly_chart(fig_bar, use_container_width=True, config = {'displayModeBar': False})
+        self.plot_figure('bar', fig_bar)
 
         return
\ No newline at end of file